@@ -0,0 +1,114 @@
+"""Numeric round-update kernels, JIT-compiled with Numba when it is installed.
+
+These live outside the Streamlit script because the script is re-executed on
+every rerun; a module is imported once per process, so compiled kernels persist.
+Numba is an optional accelerator (see requirements.txt); without it the kernels
+run as plain Python and replay_kernel's prange is a serial range.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; the kernels then run as plain Python
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Strategy codes (index into the payoff tables)
+COOPERATE, DEFECT = 0, 1
+COOPERATION_THRESHOLD = 5.5  # utility at or above which a player cooperates
+
+@njit(cache=True)
+def determine_strategy(utility):
+    """Determine if player cooperates or defects"""
+    return COOPERATE if utility >= COOPERATION_THRESHOLD else DEFECT
+
+@njit(cache=True)
+def calculate_actual_score(payoff_a, payoff_b):
+    """Convert payoffs to ELO scores (0, 0.5, or 1)"""
+    if payoff_a > payoff_b:
+        return 1.0, 0.0  # Player A wins
+    elif payoff_b > payoff_a:
+        return 0.0, 1.0  # Player B wins
+    else:
+        return 0.5, 0.5  # Draw
+
+@njit(cache=True)
+def calculate_k_factor(elo, rounds_played):
+    """Calculate dynamic K-factor based on ELO and experience"""
+    # Higher K-factor for new players, lower for experienced
+    if rounds_played < 10:
+        return 40
+    elif elo < 1400:
+        return 32
+    elif elo < 1600:
+        return 24
+    else:
+        return 16
+
+@njit(cache=True)
+def update_elo(elo_current, expected, actual, k_factor=32):
+    """Update ELO rating based on game outcome"""
+    return elo_current + k_factor * (actual - expected)
+
+@njit(cache=True)
+def lookup_expected_score(expected_table, elo_a, elo_b):
+    """Expected score for A from a table indexed by whole-point ELO difference (centred)"""
+    offset = (expected_table.shape[0] - 1) // 2
+    delta = min(max(int(np.rint(elo_b - elo_a)), -offset), offset)
+    return expected_table[delta + offset]
+
+@njit(cache=True)
+def round_kernel(payoff_a, payoff_b, elo_a, elo_b, rounds_played, expected_table):
+    """Score one round and update both ratings; returns (expected_a, actual_a, new_elo_a, new_elo_b)"""
+    expected_a = lookup_expected_score(expected_table, elo_a, elo_b)
+    actual_a, actual_b = calculate_actual_score(payoff_a, payoff_b)
+    new_elo_a = update_elo(elo_a, expected_a, actual_a, calculate_k_factor(elo_a, rounds_played))
+    new_elo_b = update_elo(elo_b, 1 - expected_a, actual_b, calculate_k_factor(elo_b, rounds_played))
+    return expected_a, actual_a, new_elo_a, new_elo_b
+
+@njit(cache=True, parallel=True)
+def replay_kernel(utility_a, utility_b, payoff_a_table, payoff_b_table, expected_table):
+    """Replay independent simulations from (n_sims, n_rounds) utilities, in parallel across simulations
+
+    Returns ELO histories (n_sims, 2, n_rounds + 1), payoffs and strategy codes (n_sims, 2, n_rounds).
+    """
+    n_sims, n_rounds = utility_a.shape
+    elo_history = np.empty((n_sims, 2, n_rounds + 1), dtype=np.float32)
+    payoffs = np.empty((n_sims, 2, n_rounds), dtype=np.int16)
+    strategies = np.empty((n_sims, 2, n_rounds), dtype=np.int8)
+    for sim in prange(n_sims):
+        elo_a = 1500.0
+        elo_b = 1500.0
+        elo_history[sim, 0, 0] = elo_a
+        elo_history[sim, 1, 0] = elo_b
+        for r in range(n_rounds):
+            strategy_a = determine_strategy(utility_a[sim, r])
+            strategy_b = determine_strategy(utility_b[sim, r])
+            payoff_a = payoff_a_table[strategy_a, strategy_b]
+            payoff_b = payoff_b_table[strategy_a, strategy_b]
+            _, _, elo_a, elo_b = round_kernel(payoff_a, payoff_b, elo_a, elo_b, r, expected_table)
+            strategies[sim, 0, r] = strategy_a
+            strategies[sim, 1, r] = strategy_b
+            payoffs[sim, 0, r] = payoff_a
+            payoffs[sim, 1, r] = payoff_b
+            elo_history[sim, 0, r + 1] = elo_a
+            elo_history[sim, 1, r + 1] = elo_b
+    return elo_history, payoffs, strategies
+
+def replay_rounds(metrics_a, metrics_b, payoff_a_table, payoff_b_table, expected_table):
+    """Batch-replay independent simulations from (n_sims, n_rounds, n_metrics) metric arrays
+
+    Each round's utility is the mean of its metrics. The payoff tables are indexed as
+    [strategy_a, strategy_b] and expected_table is the centred whole-point expected-score table.
+    A single (n_rounds, n_metrics) simulation is accepted too. Returns ELO histories, payoffs
+    and strategy codes from replay_kernel.
+    """
+    utility_a = np.atleast_2d(np.asarray(metrics_a, dtype=np.float64).mean(axis=-1))
+    utility_b = np.atleast_2d(np.asarray(metrics_b, dtype=np.float64).mean(axis=-1))
+    return replay_kernel(utility_a, utility_b, np.asarray(payoff_a_table), np.asarray(payoff_b_table),
+                         np.asarray(expected_table, dtype=np.float64))
@@ -6,7 +6,11 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import yaml
 from datetime import datetime
+import time
 import math
+import bisect
+from collections import deque
+from game_kernels import COOPERATE, DEFECT, COOPERATION_THRESHOLD, round_kernel
 
 # Page configuration
 st.set_page_config(
@@ -78,19 +82,133 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Game history storage: one preallocated array per column, grown geometrically.
+# st.session_state.round_number is the number of rows in use.
+HISTORY_COLUMNS = {
+    'round': np.int32,
+    'strategy_a': np.int8,
+    'strategy_b': np.int8,
+    'utility_a': np.float64,
+    'utility_b': np.float64,
+    'payoff_a': np.int16,
+    'payoff_b': np.int16,
+    'outcome': object,
+    'game_type': object,
+    'f_score': np.float64,
+    'elo_a': np.float64,
+    'elo_b': np.float64,
+    'new_elo_a': np.float64,
+    'new_elo_b': np.float64,
+    'elo_change_a': np.float64,
+    'elo_change_b': np.float64,
+    'expected_a': np.float64,
+    'actual_a': np.float64,
+    'timestamp': np.int64,  # ns since session_start_ns (monotonic clock)
+}
+
+def new_history(capacity=64):
+    """Allocate empty column buffers for the game history"""
+    return {col: np.empty(capacity, dtype=dtype) for col, dtype in HISTORY_COLUMNS.items()}
+
+def append_round(history, n, round_data):
+    """Write round_data into row n, doubling the buffers when full"""
+    if n == len(history['round']):
+        for col, arr in history.items():
+            grown = np.empty(2 * n, dtype=arr.dtype)
+            grown[:n] = arr
+            history[col] = grown
+    for col, value in round_data.items():
+        history[col][n] = value
+
+def history_frame(history, n):
+    """Build a DataFrame over the first n rows of the game history, with strategy names"""
+    df = pd.DataFrame({col: arr[:n] for col, arr in history.items()}, copy=False)
+    df['strategy_a'] = STRATEGY_LABELS[history['strategy_a'][:n]]
+    df['strategy_b'] = STRATEGY_LABELS[history['strategy_b'][:n]]
+    return df
+
+def new_round_stats():
+    """Running totals over the recorded rounds, updated once per round instead of per rerun"""
+    return {
+        'wins_a': 0,
+        'wins_b': 0,
+        'draws': 0,
+        'upsets_a': 0,
+        'upsets_b': 0,
+        'sum_abs_elo_change': 0.0,
+        'peak_elo_a': 1500.0,
+        'peak_elo_b': 1500.0,
+    }
+
+def record_round_stats(stats, actual_a, expected_a, elo_change_a, new_elo_a, new_elo_b):
+    """Fold one round into the running totals"""
+    if actual_a == 1.0:
+        stats['wins_a'] += 1
+        stats['upsets_a'] += int(expected_a < 0.5)  # won as the underdog
+    elif actual_a == 0.0:
+        stats['wins_b'] += 1
+        stats['upsets_b'] += int(expected_a > 0.5)
+    else:
+        stats['draws'] += 1
+    stats['sum_abs_elo_change'] += abs(float(elo_change_a))
+    stats['peak_elo_a'] = max(stats['peak_elo_a'], float(new_elo_a))
+    stats['peak_elo_b'] = max(stats['peak_elo_b'], float(new_elo_b))
+
+def new_elo_history(capacity=64):
+    """Allocate a float32 ELO history buffer (row 0: Player A, row 1: Player B) seeded with the starting rating"""
+    elo_history = np.empty((2, capacity), dtype=np.float32)
+    elo_history[:, 0] = 1500
+    return elo_history
+
+MAX_ELO_HISTORY = 1000  # most recent ELO points kept for the chart
+RECENT_WINDOW = 5  # rounds covered by the recent cooperation rate and ELO momentum
+
+def new_recent_elo():
+    """ELO snapshots (A, B) over the momentum window, seeded with the starting ratings"""
+    return deque([(1500, 1500)], maxlen=RECENT_WINDOW)
+
+def append_elo(elo_history, n, elo_a, elo_b):
+    """Write both ratings at column n; returns (buffer, columns dropped from the front)
+
+    The buffer doubles until it spans 2 * MAX_ELO_HISTORY columns; after that the newest
+    MAX_ELO_HISTORY points are slid to the front instead, so memory stays bounded.
+    """
+    dropped = 0
+    if n == elo_history.shape[1]:
+        if n >= 2 * MAX_ELO_HISTORY:
+            dropped = n - MAX_ELO_HISTORY
+            elo_history[:, :MAX_ELO_HISTORY] = elo_history[:, dropped:n]
+            n = MAX_ELO_HISTORY
+        else:
+            elo_history = np.concatenate((elo_history, np.empty_like(elo_history)), axis=1)
+    elo_history[0, n] = elo_a
+    elo_history[1, n] = elo_b
+    return elo_history, dropped
+
 # Initialize session state
 if 'game_history' not in st.session_state:
-    st.session_state.game_history = []
+    st.session_state.game_history = new_history()
 if 'round_number' not in st.session_state:
     st.session_state.round_number = 0
+if 'round_stats' not in st.session_state:
+    st.session_state.round_stats = new_round_stats()
+if 'recent_cooperation' not in st.session_state:
+    st.session_state.recent_cooperation = deque(maxlen=RECENT_WINDOW)  # 1 per mutually cooperative round
 if 'elo_a' not in st.session_state:
     st.session_state.elo_a = 1500  # Starting ELO
 if 'elo_b' not in st.session_state:
     st.session_state.elo_b = 1500  # Starting ELO
-if 'elo_history_a' not in st.session_state:
-    st.session_state.elo_history_a = [1500]
-if 'elo_history_b' not in st.session_state:
-    st.session_state.elo_history_b = [1500]
+if 'elo_history' not in st.session_state:
+    st.session_state.elo_history = new_elo_history()
+if 'elo_history_len' not in st.session_state:
+    st.session_state.elo_history_len = 1
+if 'elo_history_offset' not in st.session_state:
+    st.session_state.elo_history_offset = 0  # point index of buffer column 0
+if 'recent_elo' not in st.session_state:
+    st.session_state.recent_elo = new_recent_elo()
+if 'session_start' not in st.session_state:
+    st.session_state.session_start = datetime.now()
+    st.session_state.session_start_ns = time.monotonic_ns()
 
 # YAML Configuration
 yaml_config = """
@@ -118,123 +236,159 @@ elo_tiers:
   grandmaster: {min: 1800, max: 3000, description: "Relationship Expert"}
 """
 
-config = yaml.safe_load(yaml_config)
+@st.cache_resource
+def load_config():
+    """Parse the YAML configuration once per server process"""
+    return yaml.safe_load(yaml_config)
+
+config = load_config()
+
+# Strategy codes (COOPERATE/DEFECT from game_kernels) index into the payoff tables below
+STRATEGY_NAMES = ("Cooperate", "Defect")
+STRATEGY_LABELS = np.array(STRATEGY_NAMES)
+
+# Payoff tables indexed as [strategy_a, strategy_b]
+_payoff_cells = (
+    (config['payoff_matrix']['cooperate_cooperate'], config['payoff_matrix']['cooperate_defect']),
+    (config['payoff_matrix']['defect_cooperate'], config['payoff_matrix']['defect_defect']),
+)
+PAYOFF_A = np.array([[cell['a'] for cell in row] for row in _payoff_cells])
+PAYOFF_B = np.array([[cell['b'] for cell in row] for row in _payoff_cells])
+PAYOFF_OUTCOME = tuple(tuple(cell['outcome'] for cell in row) for row in _payoff_cells)
 
 # ELO Rating Functions
+ELO_DELTA_RANGE = 3000  # matches the 0-3000 rating range
+
+@st.cache_resource
+def expected_score_table():
+    """Expected score for every whole-point ELO difference in [-3000, 3000], as an array and a tuple"""
+    deltas = np.arange(-ELO_DELTA_RANGE, ELO_DELTA_RANGE + 1)
+    table = 1 / (1 + 10 ** (deltas / 400))
+    return table, tuple(table.tolist())
+
+# The array feeds the game_kernels functions; the tuple is faster to index from Python
+EXPECTED_SCORE_TABLE, EXPECTED_SCORE = expected_score_table()
+
 def calculate_expected_score(elo_a, elo_b):
-    """Calculate expected score using ELO formula"""
-    return 1 / (1 + 10 ** ((elo_b - elo_a) / 400))
+    """Calculate expected score using ELO formula, looked up per whole rating point"""
+    delta = min(max(round(elo_b - elo_a), -ELO_DELTA_RANGE), ELO_DELTA_RANGE)
+    return EXPECTED_SCORE[delta + ELO_DELTA_RANGE]
+
+# ELO tiers in ascending order; a rating reaches a tier at its configured minimum
+ELO_TIERS = (
+    ("Novice", "elo-novice", "🌱"),
+    ("Intermediate", "elo-intermediate", "📈"),
+    ("Expert", "elo-expert", "⭐"),
+    ("Master", "elo-master", "🏆"),
+    ("Grandmaster", "elo-grandmaster", "👑"),
+)
+ELO_TIER_THRESHOLDS = tuple(
+    config['elo_tiers'][tier]['min'] for tier in ('intermediate', 'expert', 'master', 'grandmaster')
+)
+
+ELO_CARD_TEMPLATE = """
+    <div class="elo-rating {css_class}">
+        {emoji} Player {player}<br>
+        {elo}<br>
+        <small>{tier}</small>
+    </div>
+    """
+
+ELO_TIER_BUCKET = 100  # every tier minimum is a multiple of this, so only elo // 100 matters
 
-def update_elo(elo_current, expected, actual, k_factor=32):
-    """Update ELO rating based on game outcome"""
-    return elo_current + k_factor * (actual - expected)
+@st.cache_resource
+def elo_tier_buckets():
+    """Tier for every 100-point ELO bucket in the 0-3000 rating range"""
+    return tuple(ELO_TIERS[bisect.bisect_right(ELO_TIER_THRESHOLDS, bucket * ELO_TIER_BUCKET)]
+                 for bucket in range(ELO_DELTA_RANGE // ELO_TIER_BUCKET + 1))
+
+ELO_TIER_BY_BUCKET = elo_tier_buckets()
 
 def get_elo_tier(elo):
     """Get ELO tier and color"""
-    tiers = config['elo_tiers']
-    if elo >= tiers['grandmaster']['min']:
-        return "Grandmaster", "elo-grandmaster", "👑"
-    elif elo >= tiers['master']['min']:
-        return "Master", "elo-master", "🏆"
-    elif elo >= tiers['expert']['min']:
-        return "Expert", "elo-expert", "⭐"
-    elif elo >= tiers['intermediate']['min']:
-        return "Intermediate", "elo-intermediate", "📈"
-    else:
-        return "Novice", "elo-novice", "🌱"
-
-def calculate_actual_score(payoff_a, payoff_b):
-    """Convert payoffs to ELO scores (0, 0.5, or 1)"""
-    if payoff_a > payoff_b:
-        return 1.0, 0.0  # Player A wins
-    elif payoff_b > payoff_a:
-        return 0.0, 1.0  # Player B wins
-    else:
-        return 0.5, 0.5  # Draw
-
-def calculate_k_factor(elo, rounds_played):
-    """Calculate dynamic K-factor based on ELO and experience"""
-    # Higher K-factor for new players, lower for experienced
-    if rounds_played < 10:
-        return 40
-    elif elo < 1400:
-        return 32
-    elif elo < 1600:
-        return 24
-    else:
-        return 16
+    bucket = min(max(int(elo) // ELO_TIER_BUCKET, 0), len(ELO_TIER_BY_BUCKET) - 1)
+    return ELO_TIER_BY_BUCKET[bucket]
 
 # Game Theory Functions
-def calculate_utility(metrics):
-    """Calculate utility from player metrics"""
-    return np.mean(list(metrics.values()))
-
 def determine_strategy(utility):
-    """Determine if player cooperates or defects"""
-    return "Cooperate" if utility >= 5.5 else "Defect"
-
-def calculate_payoff(strategy_a, strategy_b, utility_a, utility_b):
-    """Calculate payoffs based on strategies"""
-    payoff_matrix = config['payoff_matrix']
-    
-    if strategy_a == "Cooperate" and strategy_b == "Cooperate":
-        return payoff_matrix['cooperate_cooperate']
-    elif strategy_a == "Cooperate" and strategy_b == "Defect":
-        return payoff_matrix['cooperate_defect']
-    elif strategy_a == "Defect" and strategy_b == "Cooperate":
-        return payoff_matrix['defect_cooperate']
-    elif strategy_a == "Defect" and strategy_b == "Defect":
-        return payoff_matrix['defect_defect']
-    else:
-        avg_utility = (utility_a + utility_b) / 2
-        if avg_utility >= 6.5:
-            return payoff_matrix['asymmetric_investment']
-        return payoff_matrix['mixed_strategy']
+    """Determine if player cooperates or defects (plain Python; a jitted call costs more per rerun)"""
+    return COOPERATE if utility >= COOPERATION_THRESHOLD else DEFECT
+
+def calculate_payoff(strategy_a, strategy_b):
+    """Calculate payoffs and outcome label based on strategy codes"""
+    return (int(PAYOFF_A[strategy_a, strategy_b]), int(PAYOFF_B[strategy_a, strategy_b]),
+            PAYOFF_OUTCOME[strategy_a][strategy_b])
 
-def identify_game_type(history):
+def identify_game_type(history, n):
     """Identify the type of game being played"""
-    if len(history) < 3:
+    if n < 3:
         return "Initial Assessment Phase"
     
-    recent = history[-5:]
-    coop_count = sum(1 for h in recent if h['strategy_a'] == "Cooperate" and h['strategy_b'] == "Cooperate")
+    # At most five rows: a scalar loop over plain ints beats NumPy dispatch here
+    start = max(0, n - 5)
+    recent_a = history['strategy_a'][start:n].tolist()
+    recent_b = history['strategy_b'][start:n].tolist()
+    coop_count = 0
+    for a, b in zip(recent_a, recent_b):
+        coop_count += a == COOPERATE and b == COOPERATE
     
-    last_round = history[-1]
-    if last_round['strategy_a'] == "Defect" and last_round['strategy_b'] == "Defect":
+    last_a, last_b = recent_a[-1], recent_b[-1]
+    if last_a == DEFECT and last_b == DEFECT:
         return "Prisoner's Dilemma"
-    elif last_round['strategy_a'] != last_round['strategy_b'] and coop_count < 2:
+    elif last_a != last_b and coop_count < 2:
         return "Battle of Sexes"
     elif coop_count >= 3:
         return "Stag Hunt (Trust Building)"
-    elif len(history) > 5:
+    elif n > 5:
         return "Repeated Game"
     return "Chicken Game (Brinkmanship)"
 
-def calculate_outcome_score(player_a, player_b):
-    """Calculate final outcome score (f)"""
-    utility_a = calculate_utility(player_a)
-    utility_b = calculate_utility(player_b)
-    
-    prompt_quality = (utility_a + utility_b) / 2 / 10
-    response_authenticity = (player_a.get('authenticity_ratio', 5) + player_b.get('reciprocity_level', 5)) / 2 / 10
-    resource_balance = 1 - abs(utility_a - utility_b) / 10
-    time_investment = (player_a.get('time_investment', 5) + player_b.get('emotional_availability', 5)) / 2 / 10
-    
-    f = prompt_quality * response_authenticity * resource_balance * time_investment
-    
-    if f > 0.8:
-        return f, "MATCHED", "🎉"
-    elif f > 0.6:
-        return f, "ENGAGED", "💍"
-    elif f > 0.4:
-        return f, "COMPLICATED", "⚠️"
-    elif f > 0.2:
-        return f, "CONFUSED", "🤔"
-    else:
-        return f, "NOT MATCHED", "💔"
+# Outcome bands: f <= 0.2 is NOT MATCHED, 0.2 < f <= 0.4 is CONFUSED, ...
+OUTCOME_THRESHOLDS = (0.2, 0.4, 0.6, 0.8)
+OUTCOMES = (
+    ("NOT MATCHED", "💔"),
+    ("CONFUSED", "🤔"),
+    ("COMPLICATED", "⚠️"),
+    ("ENGAGED", "💍"),
+    ("MATCHED", "🎉"),
+)
+OUTCOME_CSS_CLASS = {
+    "NOT MATCHED": "outcome-not-matched",
+    "CONFUSED": "outcome-confused",
+    "COMPLICATED": "outcome-complicated",
+    "ENGAGED": "outcome-engaged",
+    "MATCHED": "outcome-matched",
+}
+# Recommendation shown for each outcome, as (alert function, message)
+OUTCOME_RECOMMENDATIONS = {
+    "NOT MATCHED": (st.error, "💔 **Misalignment.** Significant strategy change needed. Consider if goals are compatible."),
+    "CONFUSED": (st.warning, "🤔 **Mixed Signals.** Improve communication clarity and consistency."),
+    "COMPLICATED": (st.warning, "⚠️ **Power Games Detected.** Both players should increase authenticity and reduce defensive tactics."),
+    "ENGAGED": (st.info, "💍 **Good Progress!** Continue building trust and increasing mutual investment."),
+    "MATCHED": (st.success, "🎉 **Excellent!** You've reached Nash equilibrium. Maintain current cooperation level."),
+}
+OUTCOME_CARD_TEMPLATE = """
+<div class="{css_class}">
+    <h2 style='text-align: center;'>{emoji} Current Outcome: {outcome} {emoji}</h2>
+    <h3 style='text-align: center;'>Outcome Score (f): {f_score:.3f}</h3>
+    <p style='text-align: center;'>Player A: {strategy_a} | Player B: {strategy_b}</p>
+</div>
+"""
 
+def calculate_outcome_score(player_a, player_b, utility_a, utility_b):
+    """Calculate final outcome score (f) from the players' metrics and utilities"""
+    f = (((utility_a + utility_b) / 20)                                                 # prompt quality
+         * ((player_a['authenticity_ratio'] + player_b['reciprocity_level']) / 20)      # response authenticity
+         * (1 - abs(utility_a - utility_b) / 10)                                        # resource balance
+         * ((player_a['time_investment'] + player_b['emotional_availability']) / 20))   # time investment
+    
+    # bisect_left keeps each threshold in the lower band (f must strictly exceed it)
+    outcome, emoji = OUTCOMES[bisect.bisect_left(OUTCOME_THRESHOLDS, f)]
+    return f, outcome, emoji
+
+@st.cache_resource
 def classify_game_comprehensive():
-    """Comprehensive game classification"""
+    """Comprehensive game classification (static, built once per server process)"""
     classification = {
         "Cooperation Type": {
             "Category": "Non-Cooperative → Cooperative Transition",
@@ -271,6 +425,310 @@ def classify_game_comprehensive():
     }
     return classification
 
+# Chart Builders (cached on the data they plot, so unrelated widget changes skip them)
+MAX_CHART_POINTS = 500  # per scatter trace; longer histories are decimated
+# Every new round changes the builders' inputs, so old entries are never hit again; keep only
+# the latest few per builder (enough for a handful of concurrent sessions) so memory stays bounded
+CHART_CACHE_ENTRIES = 8
+
+def chart_sample(n):
+    """Indices of at most ~MAX_CHART_POINTS evenly spaced points out of n, always keeping the last"""
+    step = -(-n // MAX_CHART_POINTS)
+    index = np.arange(0, n, step)
+    if index[-1] != n - 1:
+        index = np.append(index, n - 1)
+    return index
+
+def chart_mode(n):
+    """Draw markers only while every point is plotted"""
+    return 'lines+markers' if n <= MAX_CHART_POINTS else 'lines'
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def build_elo_figures(elo_points, elo_history_a, elo_history_b, df):
+    """ELO evolution, per-round ELO change and win probability charts"""
+    elo_sample = chart_sample(len(elo_points))
+    plot_df = df.iloc[chart_sample(len(df))]
+    
+    # ELO Rating Evolution
+    fig_elo = go.Figure()
+    fig_elo.add_trace(go.Scatter(
+        x=elo_points[elo_sample], 
+        y=elo_history_a[elo_sample], 
+        mode=chart_mode(len(elo_points)), 
+        name='Player A ELO',
+        line=dict(color='#3B82F6', width=3),
+        marker=dict(size=8)
+    ))
+    fig_elo.add_trace(go.Scatter(
+        x=elo_points[elo_sample], 
+        y=elo_history_b[elo_sample], 
+        mode=chart_mode(len(elo_points)), 
+        name='Player B ELO',
+        line=dict(color='#EC4899', width=3),
+        marker=dict(size=8)
+    ))
+
+    # Add tier lines
+    fig_elo.add_hline(y=1800, line_dash="dash", line_color="purple", annotation_text="Grandmaster")
+    fig_elo.add_hline(y=1600, line_dash="dash", line_color="red", annotation_text="Master")
+    fig_elo.add_hline(y=1400, line_dash="dash", line_color="blue", annotation_text="Expert")
+    fig_elo.add_hline(y=1200, line_dash="dash", line_color="green", annotation_text="Intermediate")
+
+    fig_elo.update_layout(
+        title="ELO Rating Evolution",
+        xaxis_title="Round",
+        yaxis_title="ELO Rating",
+        height=500,
+        hovermode='x unified'
+    )
+
+    # ELO Change per round
+    fig_elo_change = go.Figure()
+    fig_elo_change.add_trace(go.Bar(
+        x=df['round'],
+        y=df['elo_change_a'],
+        name='Player A ELO Change',
+        marker_color='#3B82F6'
+    ))
+    fig_elo_change.add_trace(go.Bar(
+        x=df['round'],
+        y=df['elo_change_b'],
+        name='Player B ELO Change',
+        marker_color='#EC4899'
+    ))
+    fig_elo_change.update_layout(
+        title="ELO Rating Changes per Round",
+        xaxis_title="Round",
+        yaxis_title="ELO Change",
+        height=400,
+        barmode='group'
+    )
+
+    # Win Probability Evolution
+    fig_prob = go.Figure()
+    fig_prob.add_trace(go.Scatter(
+        x=plot_df['round'],
+        y=plot_df['expected_a'] * 100,
+        mode=chart_mode(len(df)),
+        name='Player A Win Probability',
+        line=dict(color='#3B82F6', width=2),
+        fill='tonexty'
+    ))
+    fig_prob.add_trace(go.Scatter(
+        x=plot_df['round'],
+        y=(1 - plot_df['expected_a']) * 100,
+        mode=chart_mode(len(df)),
+        name='Player B Win Probability',
+        line=dict(color='#EC4899', width=2)
+    ))
+    fig_prob.update_layout(
+        title="Win Probability Evolution (Based on ELO)",
+        xaxis_title="Round",
+        yaxis_title="Win Probability (%)",
+        height=400
+    )
+    return fig_elo, fig_elo_change, fig_prob
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def build_payoff_figures(df):
+    """Payoff and outcome score (f) evolution charts"""
+    plot_df = df.iloc[chart_sample(len(df))]
+    mode = chart_mode(len(df))
+    
+    # Payoff evolution chart
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=plot_df['round'], y=plot_df['payoff_a'], mode=mode, name='Player A', line=dict(color='#3B82F6', width=3)))
+    fig.add_trace(go.Scatter(x=plot_df['round'], y=plot_df['payoff_b'], mode=mode, name='Player B', line=dict(color='#EC4899', width=3)))
+    fig.update_layout(title="Payoff Evolution Over Rounds", xaxis_title="Round", yaxis_title="Payoff", height=400)
+
+    # F-score evolution
+    fig2 = go.Figure()
+    fig2.add_trace(go.Scatter(x=plot_df['round'], y=plot_df['f_score'], mode=mode, fill='tozeroy', line=dict(color='#8B5CF6', width=3)))
+    fig2.add_hline(y=0.8, line_dash="dash", line_color="green", annotation_text="Matched Threshold")
+    fig2.add_hline(y=0.6, line_dash="dash", line_color="blue", annotation_text="Engaged Threshold")
+    fig2.add_hline(y=0.4, line_dash="dash", line_color="orange", annotation_text="Complicated Threshold")
+    fig2.add_hline(y=0.2, line_dash="dash", line_color="red", annotation_text="Confused Threshold")
+    fig2.update_layout(title="Outcome Score (f) Evolution", xaxis_title="Round", yaxis_title="f Score", height=400)
+    return fig, fig2
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def build_strategy_figures(strategy_a, strategy_b, df):
+    """Strategy combination frequency and outcome distribution charts"""
+    # Strategy distribution: pack each (a, b) code pair into 2*a + b and count in one pass
+    pair_counts = np.bincount(2 * strategy_a.astype(np.intp) + strategy_b, minlength=4)
+    pairs = np.flatnonzero(pair_counts)
+
+    fig3 = go.Figure(data=[go.Bar(
+        x=[f"A:{STRATEGY_NAMES[p // 2]}<br>B:{STRATEGY_NAMES[p % 2]}" for p in pairs],
+        y=pair_counts[pairs],
+        marker_color=['#10B981' if p == 2 * COOPERATE + COOPERATE else '#EF4444' for p in pairs]
+    )])
+    fig3.update_layout(title="Strategy Combination Frequency", xaxis_title="Strategy Pair", yaxis_title="Frequency", height=400)
+
+    # Outcome distribution
+    outcome_counts = df['outcome'].value_counts()
+    fig4 = go.Figure(data=[go.Pie(labels=outcome_counts.index, values=outcome_counts.values, hole=0.4)])
+    fig4.update_layout(title="Outcome Distribution", height=400)
+    return fig3, fig4
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def build_game_type_figures(df):
+    """Game type evolution and utility comparison charts"""
+    plot_df = df.iloc[chart_sample(len(df))]
+    mode = chart_mode(len(df))
+    
+    # Game type evolution
+    fig5 = go.Figure()
+    game_types = df['game_type'].unique()
+    for gt in game_types:
+        # Decimate per game type so rare types still appear
+        gt_rounds = df['round'].to_numpy()[(df['game_type'] == gt).to_numpy()]
+        gt_rounds = gt_rounds[chart_sample(len(gt_rounds))]
+        fig5.add_trace(go.Scatter(x=gt_rounds, y=[gt]*len(gt_rounds), mode='markers', name=gt, marker=dict(size=12)))
+    fig5.update_layout(title="Game Type Evolution", xaxis_title="Round", yaxis_title="Game Type", height=400)
+
+    # Utility comparison
+    fig6 = make_subplots(rows=1, cols=2, subplot_titles=("Player A Utility", "Player B Utility"))
+    fig6.add_trace(go.Scatter(x=plot_df['round'], y=plot_df['utility_a'], mode=mode, name='Utility A', line=dict(color='#3B82F6')), row=1, col=1)
+    fig6.add_trace(go.Scatter(x=plot_df['round'], y=plot_df['utility_b'], mode=mode, name='Utility B', line=dict(color='#EC4899')), row=1, col=2)
+    fig6.update_xaxes(title_text="Round", row=1, col=1)
+    fig6.update_xaxes(title_text="Round", row=1, col=2)
+    fig6.update_yaxes(title_text="Utility", row=1, col=1)
+    fig6.update_yaxes(title_text="Utility", row=1, col=2)
+    fig6.update_layout(height=400, showlegend=False)
+    return fig5, fig6
+
+# Fragments (rerun on their own when a widget inside them is used)
+@st.fragment
+def render_history_table(df):
+    """Detailed history table and CSV download; the download click reruns only this fragment"""
+    # Detailed history table
+    display_df = df[['round', 'strategy_a', 'strategy_b', 'payoff_a', 'payoff_b', 
+                     'outcome', 'game_type', 'f_score', 'elo_a', 'elo_b', 
+                     'elo_change_a', 'elo_change_b']].copy()
+    
+    # Round values for display
+    display_df['elo_a'] = display_df['elo_a'].round(0).astype(int)
+    display_df['elo_b'] = display_df['elo_b'].round(0).astype(int)
+    display_df['elo_change_a'] = display_df['elo_change_a'].round(1)
+    display_df['elo_change_b'] = display_df['elo_change_b'].round(1)
+    display_df['f_score'] = display_df['f_score'].round(3)
+    
+    st.dataframe(
+        display_df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'round': 'Round',
+            'strategy_a': 'Strategy A',
+            'strategy_b': 'Strategy B',
+            'payoff_a': 'Payoff A',
+            'payoff_b': 'Payoff B',
+            'outcome': 'Outcome',
+            'game_type': 'Game Type',
+            'f_score': 'f Score',
+            'elo_a': 'ELO A',
+            'elo_b': 'ELO B',
+            'elo_change_a': 'Δ ELO A',
+            'elo_change_b': 'Δ ELO B'
+        }
+    )
+    
+    # Download button
+    # Timestamps are stored as monotonic offsets; convert to wall-clock time only for export
+    timestamps = pd.Timestamp(st.session_state.session_start) + pd.to_timedelta(df['timestamp'], unit='ns')
+    csv = df.assign(timestamp=timestamps.dt.floor('us')).to_csv(index=False)
+    st.download_button(
+        label="📥 Download Game History CSV",
+        data=csv,
+        file_name=f"relationship_game_theory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv"
+    )
+
+# Static Content
+CONCLUSION_MD = """
+    ### This Relationship Game is:
+    
+    **1. Non-Cooperative Game (Transitioning to Cooperative)**
+    - Players independently maximize their utility initially
+    - Can evolve into cooperative game at Nash equilibrium
+    - Strategic interaction without binding agreements
+    
+    **2. Simultaneous Move Game**
+    - Both players adjust strategies without real-time opponent knowledge
+    - No sequential advantage
+    
+    **3. Imperfect & Incomplete Information Game**
+    - Imperfect: Cannot observe all actions (hidden intentions, pseudo-altruism)
+    - Incomplete: Don't know exact payoff functions of opponent
+    - Creates strategic uncertainty
+    
+    **4. Non-Zero-Sum Game**
+    - Both can win (8,8) or both can lose (4,4)
+    - Total welfare varies by outcome
+    - Cooperation increases total payoff
+    
+    **5. Asymmetric Game (Becoming Symmetric)**
+    - Different initial resources and strategies
+    - Becomes symmetric when equilibrium reached
+    - Role interchangeability at Nash equilibrium
+    
+    **6. Dynamic/Repeated Game**
+    - Multiple rounds with history
+    - Reputation effects matter
+    - Enables tit-for-tat and learning strategies
+    
+    **7. ELO Rating System Integration**
+    - Measures player skill in strategic relationship dynamics
+    - Adapts K-factor based on experience and rating
+    - Tracks performance evolution over time
+    - Identifies upsets and momentum shifts
+    
+    **8. Similar to Classic Games:**
+    - **Prisoner's Dilemma** (when trust is low)
+    - **Battle of Sexes** (coordination with preference differences)
+    - **Stag Hunt** (high cooperation payoff, requires trust)
+    - **Chicken Game** (brinkmanship, who yields first)
+    """
+
+# Recommendation lists, each emitted as a single markdown element
+PATH_FORWARD_MD = """
+**Path Forward:**
+- Increase vulnerability and authenticity
+- Reduce manipulation tactics
+- Build trust through consistent actions
+- Move from defection to conditional cooperation
+- Focus on win-win outcomes to improve both ELO ratings
+"""
+
+MAINTAIN_SUCCESS_MD = """
+**Maintain Success:**
+- Continue transparent communication
+- Keep investing mutually
+- Avoid complacency
+- Regular relationship check-ins
+- Sustain high ELO through consistent cooperation
+"""
+
+# (property, value) pairs for the Key Properties column
+KEY_PROPERTIES = (
+    ("Pareto Optimal", "(8,8) - Mutual Cooperation"),
+    ("Nash Equilibrium", "(8,8) when both cooperate"),
+    ("Dominant Strategy", "None (depends on opponent)"),
+    ("Best Response", "Tit-for-tat with forgiveness"),
+    ("Evolutionarily Stable", "Cooperation in repeated game"),
+    ("ELO Starting Rating", "1500"),
+    ("ELO Range", "0-3000"),
+)
+
+FOOTER_HTML = """
+<div style='text-align: center; color: #666;'>
+    <p>Built with Streamlit | Game Theory Analysis Framework with ELO Rating System</p>
+    <p>Based on Nash Equilibrium, Prisoner's Dilemma, Repeated Game Theory, and ELO Rating Algorithm</p>
+    <p>ELO system adapted from chess ratings - measures strategic relationship skill</p>
+</div>
+"""
+
 # Header
 st.title("💑 Relationship Game Theory Analyzer with ELO Rating System")
 st.markdown("### Nash Equilibrium & Strategic Interaction Analysis")
@@ -283,13 +741,9 @@ elo_col1, elo_col2, elo_col3 = st.columns(3)
 
 with elo_col1:
     tier_a, class_a, emoji_a = get_elo_tier(st.session_state.elo_a)
-    st.markdown(f"""
-    <div class="elo-rating {class_a}">
-        {emoji_a} Player A<br>
-        {int(st.session_state.elo_a)}<br>
-        <small>{tier_a}</small>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(ELO_CARD_TEMPLATE.format(css_class=class_a, emoji=emoji_a, player="A",
+                                         elo=int(st.session_state.elo_a), tier=tier_a),
+                unsafe_allow_html=True)
     
 with elo_col2:
     elo_diff = st.session_state.elo_a - st.session_state.elo_b
@@ -301,13 +755,9 @@ with elo_col2:
 
 with elo_col3:
     tier_b, class_b, emoji_b = get_elo_tier(st.session_state.elo_b)
-    st.markdown(f"""
-    <div class="elo-rating {class_b}">
-        {emoji_b} Player B<br>
-        {int(st.session_state.elo_b)}<br>
-        <small>{tier_b}</small>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(ELO_CARD_TEMPLATE.format(css_class=class_b, emoji=emoji_b, player="B",
+                                         elo=int(st.session_state.elo_b), tier=tier_b),
+                unsafe_allow_html=True)
 
 # ELO Tier Explanation
 with st.expander("📊 ELO Rating System Explanation"):
@@ -385,56 +835,54 @@ with col1:
     st.markdown(f"### 🛡️ Player A: Power Strategist")
     st.markdown(f"*ELO: {int(st.session_state.elo_a)} ({tier_a}) {emoji_a}*")
     
-    player_a = {
-        'prompt_frequency': st.slider("Prompt Frequency", 0, 10, 5, key='a_pf'),
-        'message_depth': st.slider("Message Depth", 0, 10, 5, key='a_md'),
-        'vulnerability_level': st.slider("Vulnerability Level", 0, 10, 5, key='a_vl'),
-        'time_investment': st.slider("Time Investment", 0, 10, 5, key='a_ti'),
-        'financial_gestures': st.slider("Financial Gestures", 0, 10, 5, key='a_fg'),
-        'authenticity_ratio': st.slider("Authenticity Ratio (vs Pseudo-altruism)", 0, 10, 5, key='a_ar'),
-        'network_introduction': st.slider("Network Introduction", 0, 10, 5, key='a_ni')
-    }
+    prompt_frequency_a = st.slider("Prompt Frequency", 0, 10, 5, key='a_pf')
+    message_depth_a = st.slider("Message Depth", 0, 10, 5, key='a_md')
+    vulnerability_level_a = st.slider("Vulnerability Level", 0, 10, 5, key='a_vl')
+    time_investment_a = st.slider("Time Investment", 0, 10, 5, key='a_ti')
+    financial_gestures_a = st.slider("Financial Gestures", 0, 10, 5, key='a_fg')
+    authenticity_ratio_a = st.slider("Authenticity Ratio (vs Pseudo-altruism)", 0, 10, 5, key='a_ar')
+    network_introduction_a = st.slider("Network Introduction", 0, 10, 5, key='a_ni')
     
-    utility_a = calculate_utility(player_a)
+    # Utility is the mean of the seven metrics
+    utility_a = (prompt_frequency_a + message_depth_a + vulnerability_level_a + time_investment_a
+                 + financial_gestures_a + authenticity_ratio_a + network_introduction_a) / 7
+    # Only the metrics calculate_outcome_score reads by name
+    player_a = {'time_investment': time_investment_a, 'authenticity_ratio': authenticity_ratio_a}
     strategy_a = determine_strategy(utility_a)
     
     st.metric("Utility Score", f"{utility_a:.2f}")
-    st.metric("Current Strategy", strategy_a, delta="Cooperative" if strategy_a == "Cooperate" else "Defensive")
+    st.metric("Current Strategy", STRATEGY_NAMES[strategy_a], delta="Cooperative" if strategy_a == COOPERATE else "Defensive")
 
 with col2:
     st.markdown(f"### 👑 Player B: Quality Curator")
     st.markdown(f"*ELO: {int(st.session_state.elo_b)} ({tier_b}) {emoji_b}*")
     
-    player_b = {
-        'prompt_frequency': st.slider("Prompt Frequency", 0, 10, 5, key='b_pf'),
-        'message_depth': st.slider("Message Depth", 0, 10, 5, key='b_md'),
-        'vulnerability_level': st.slider("Vulnerability Level", 0, 10, 5, key='b_vl'),
-        'emotional_availability': st.slider("Emotional Availability", 0, 10, 5, key='b_ea'),
-        'lifestyle_inclusion': st.slider("Lifestyle Inclusion", 0, 10, 5, key='b_li'),
-        'cultural_sharing': st.slider("Cultural Sharing (vs Gatekeeping)", 0, 10, 5, key='b_cs'),
-        'reciprocity_level': st.slider("Reciprocity Level", 0, 10, 5, key='b_rl')
-    }
+    prompt_frequency_b = st.slider("Prompt Frequency", 0, 10, 5, key='b_pf')
+    message_depth_b = st.slider("Message Depth", 0, 10, 5, key='b_md')
+    vulnerability_level_b = st.slider("Vulnerability Level", 0, 10, 5, key='b_vl')
+    emotional_availability_b = st.slider("Emotional Availability", 0, 10, 5, key='b_ea')
+    lifestyle_inclusion_b = st.slider("Lifestyle Inclusion", 0, 10, 5, key='b_li')
+    cultural_sharing_b = st.slider("Cultural Sharing (vs Gatekeeping)", 0, 10, 5, key='b_cs')
+    reciprocity_level_b = st.slider("Reciprocity Level", 0, 10, 5, key='b_rl')
     
-    utility_b = calculate_utility(player_b)
+    utility_b = (prompt_frequency_b + message_depth_b + vulnerability_level_b + emotional_availability_b
+                 + lifestyle_inclusion_b + cultural_sharing_b + reciprocity_level_b) / 7
+    player_b = {'emotional_availability': emotional_availability_b, 'reciprocity_level': reciprocity_level_b}
     strategy_b = determine_strategy(utility_b)
     
     st.metric("Utility Score", f"{utility_b:.2f}")
-    st.metric("Current Strategy", strategy_b, delta="Cooperative" if strategy_b == "Cooperate" else "Defensive")
+    st.metric("Current Strategy", STRATEGY_NAMES[strategy_b], delta="Cooperative" if strategy_b == COOPERATE else "Defensive")
 
 st.markdown("---")
 
 # Calculate outcome
-f_score, outcome, emoji = calculate_outcome_score(player_a, player_b)
+f_score, outcome, emoji = calculate_outcome_score(player_a, player_b, utility_a, utility_b)
 
 # Display current outcome
-outcome_class = f"outcome-{outcome.lower().replace(' ', '-')}"
-st.markdown(f"""
-<div class="{outcome_class}">
-    <h2 style='text-align: center;'>{emoji} Current Outcome: {outcome} {emoji}</h2>
-    <h3 style='text-align: center;'>Outcome Score (f): {f_score:.3f}</h3>
-    <p style='text-align: center;'>Player A: {strategy_a} | Player B: {strategy_b}</p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(OUTCOME_CARD_TEMPLATE.format(css_class=OUTCOME_CSS_CLASS[outcome], emoji=emoji, outcome=outcome,
+                                         f_score=f_score, strategy_a=STRATEGY_NAMES[strategy_a],
+                                         strategy_b=STRATEGY_NAMES[strategy_b]),
+            unsafe_allow_html=True)
 
 st.markdown("---")
 
@@ -442,20 +890,13 @@ st.markdown("---")
 col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
 with col1:
     if st.button("🎲 Run Simulation Round", type="primary", use_container_width=True):
-        payoff = calculate_payoff(strategy_a, strategy_b, utility_a, utility_b)
-        game_type = identify_game_type(st.session_state.game_history)
+        payoff_a, payoff_b, payoff_outcome = calculate_payoff(strategy_a, strategy_b)
+        game_type = identify_game_type(st.session_state.game_history, st.session_state.round_number)
         
         # Calculate ELO updates
-        expected_a = calculate_expected_score(st.session_state.elo_a, st.session_state.elo_b)
-        expected_b = 1 - expected_a
-        
-        actual_a, actual_b = calculate_actual_score(payoff['a'], payoff['b'])
-        
-        k_factor_a = calculate_k_factor(st.session_state.elo_a, st.session_state.round_number)
-        k_factor_b = calculate_k_factor(st.session_state.elo_b, st.session_state.round_number)
-        
-        new_elo_a = update_elo(st.session_state.elo_a, expected_a, actual_a, k_factor_a)
-        new_elo_b = update_elo(st.session_state.elo_b, expected_b, actual_b, k_factor_b)
+        expected_a, actual_a, new_elo_a, new_elo_b = round_kernel(
+            payoff_a, payoff_b, st.session_state.elo_a, st.session_state.elo_b,
+            st.session_state.round_number, EXPECTED_SCORE_TABLE)
         
         elo_change_a = new_elo_a - st.session_state.elo_a
         elo_change_b = new_elo_b - st.session_state.elo_b
@@ -466,9 +907,9 @@ with col1:
             'strategy_b': strategy_b,
             'utility_a': utility_a,
             'utility_b': utility_b,
-            'payoff_a': payoff['a'],
-            'payoff_b': payoff['b'],
-            'outcome': payoff['outcome'],
+            'payoff_a': payoff_a,
+            'payoff_b': payoff_b,
+            'outcome': payoff_outcome,
             'game_type': game_type,
             'f_score': f_score,
             'elo_a': st.session_state.elo_a,
@@ -479,380 +920,218 @@ with col1:
             'elo_change_b': elo_change_b,
             'expected_a': expected_a,
             'actual_a': actual_a,
-            'timestamp': datetime.now()
+            'timestamp': time.monotonic_ns() - st.session_state.session_start_ns
         }
         
-        st.session_state.game_history.append(round_data)
+        append_round(st.session_state.game_history, st.session_state.round_number, round_data)
+        st.session_state.pop('history_df', None)
+        record_round_stats(st.session_state.round_stats, actual_a, expected_a, elo_change_a, new_elo_a, new_elo_b)
+        st.session_state.recent_cooperation.append(int(strategy_a == COOPERATE and strategy_b == COOPERATE))
         st.session_state.round_number += 1
         
         # Update ELO ratings
         st.session_state.elo_a = new_elo_a
         st.session_state.elo_b = new_elo_b
-        st.session_state.elo_history_a.append(new_elo_a)
-        st.session_state.elo_history_b.append(new_elo_b)
+        n_elo = st.session_state.elo_history_len
+        st.session_state.elo_history, dropped = append_elo(st.session_state.elo_history, n_elo, new_elo_a, new_elo_b)
+        st.session_state.elo_history_len = n_elo - dropped + 1
+        st.session_state.elo_history_offset += dropped
+        st.session_state.recent_elo.append((new_elo_a, new_elo_b))
         
         st.rerun()
 
 with col2:
     if st.button("🔄 Reset Simulation", use_container_width=True):
-        st.session_state.game_history = []
+        # Drop the old buffers before allocating new ones so they can be freed
+        for key in ('game_history', 'history_df', 'elo_history'):
+            st.session_state.pop(key, None)
+        st.session_state.game_history = new_history()
         st.session_state.round_number = 0
+        st.session_state.round_stats = new_round_stats()
+        st.session_state.recent_cooperation = deque(maxlen=RECENT_WINDOW)
         st.session_state.elo_a = 1500
         st.session_state.elo_b = 1500
-        st.session_state.elo_history_a = [1500]
-        st.session_state.elo_history_b = [1500]
+        st.session_state.elo_history = new_elo_history()
+        st.session_state.elo_history_len = 1
+        st.session_state.elo_history_offset = 0
+        st.session_state.recent_elo = new_recent_elo()
         st.rerun()
 
 with col3:
     if st.button("🔃 Reset ELO Only", use_container_width=True):
+        st.session_state.pop('elo_history', None)
         st.session_state.elo_a = 1500
         st.session_state.elo_b = 1500
-        st.session_state.elo_history_a = [1500]
-        st.session_state.elo_history_b = [1500]
+        st.session_state.round_stats['peak_elo_a'] = 1500.0
+        st.session_state.round_stats['peak_elo_b'] = 1500.0
+        st.session_state.elo_history = new_elo_history()
+        st.session_state.elo_history_len = 1
+        st.session_state.elo_history_offset = 0
+        st.session_state.recent_elo = new_recent_elo()
         st.rerun()
 
 with col4:
     st.metric("Round", st.session_state.round_number)
 
 # Show last round ELO changes
-if st.session_state.game_history:
-    last_round = st.session_state.game_history[-1]
+history = st.session_state.game_history
+n_rounds = st.session_state.round_number
+n_elo = st.session_state.elo_history_len
+elo_start = max(0, n_elo - MAX_ELO_HISTORY)
+elo_history = st.session_state.elo_history[:, elo_start:n_elo]
+elo_history_a, elo_history_b = elo_history
+elo_points = np.arange(elo_start, n_elo) + st.session_state.elo_history_offset
+
+if n_rounds:
+    last = n_rounds - 1
     st.markdown("### 📊 Last Round ELO Changes")
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Player A ELO Change", f"{last_round['elo_change_a']:+.1f}", 
-                  delta=f"{last_round['elo_change_a']:+.1f}")
+        st.metric("Player A ELO Change", f"{history['elo_change_a'][last]:+.1f}", 
+                  delta=f"{history['elo_change_a'][last]:+.1f}")
     with col2:
-        st.metric("Player B ELO Change", f"{last_round['elo_change_b']:+.1f}",
-                  delta=f"{last_round['elo_change_b']:+.1f}")
+        st.metric("Player B ELO Change", f"{history['elo_change_b'][last]:+.1f}",
+                  delta=f"{history['elo_change_b'][last]:+.1f}")
     with col3:
-        result = "Win" if last_round['actual_a'] == 1.0 else "Loss" if last_round['actual_a'] == 0.0 else "Draw"
+        actual_last = history['actual_a'][last]
+        result = "Win" if actual_last == 1.0 else "Loss" if actual_last == 0.0 else "Draw"
         st.metric("Result", result)
 
 # Visualizations
-if st.session_state.game_history:
+if n_rounds:
     st.markdown("---")
     st.markdown("## 📊 Game Analysis & Visualizations")
     
-    df = pd.DataFrame(st.session_state.game_history)
+    # Rebuilt only after the history changes (the cached frame is dropped on every write)
+    if 'history_df' not in st.session_state:
+        st.session_state.history_df = history_frame(history, n_rounds)
+    df = st.session_state.history_df
     
     # Tabs for different visualizations
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["🏆 ELO Evolution", "📈 Payoff Evolution", "🎯 Strategy Matrix", "🎮 Game Type Evolution", "📋 Detailed History"])
     
     with tab1:
-        # ELO Rating Evolution
-        fig_elo = go.Figure()
-        fig_elo.add_trace(go.Scatter(
-            x=list(range(len(st.session_state.elo_history_a))), 
-            y=st.session_state.elo_history_a, 
-            mode='lines+markers', 
-            name='Player A ELO',
-            line=dict(color='#3B82F6', width=3),
-            marker=dict(size=8)
-        ))
-        fig_elo.add_trace(go.Scatter(
-            x=list(range(len(st.session_state.elo_history_b))), 
-            y=st.session_state.elo_history_b, 
-            mode='lines+markers', 
-            name='Player B ELO',
-            line=dict(color='#EC4899', width=3),
-            marker=dict(size=8)
-        ))
-        
-        # Add tier lines
-        fig_elo.add_hline(y=1800, line_dash="dash", line_color="purple", annotation_text="Grandmaster")
-        fig_elo.add_hline(y=1600, line_dash="dash", line_color="red", annotation_text="Master")
-        fig_elo.add_hline(y=1400, line_dash="dash", line_color="blue", annotation_text="Expert")
-        fig_elo.add_hline(y=1200, line_dash="dash", line_color="green", annotation_text="Intermediate")
-        
-        fig_elo.update_layout(
-            title="ELO Rating Evolution",
-            xaxis_title="Round",
-            yaxis_title="ELO Rating",
-            height=500,
-            hovermode='x unified'
-        )
-        st.plotly_chart(fig_elo, use_container_width=True)
-        
-        # ELO Change per round
-        fig_elo_change = go.Figure()
-        fig_elo_change.add_trace(go.Bar(
-            x=df['round'],
-            y=df['elo_change_a'],
-            name='Player A ELO Change',
-            marker_color='#3B82F6'
-        ))
-        fig_elo_change.add_trace(go.Bar(
-            x=df['round'],
-            y=df['elo_change_b'],
-            name='Player B ELO Change',
-            marker_color='#EC4899'
-        ))
-        fig_elo_change.update_layout(
-            title="ELO Rating Changes per Round",
-            xaxis_title="Round",
-            yaxis_title="ELO Change",
-            height=400,
-            barmode='group'
-        )
-        st.plotly_chart(fig_elo_change, use_container_width=True)
-        
-        # Win Probability Evolution
-        fig_prob = go.Figure()
-        fig_prob.add_trace(go.Scatter(
-            x=df['round'],
-            y=df['expected_a'] * 100,
-            mode='lines+markers',
-            name='Player A Win Probability',
-            line=dict(color='#3B82F6', width=2),
-            fill='tonexty'
-        ))
-        fig_prob.add_trace(go.Scatter(
-            x=df['round'],
-            y=(1 - df['expected_a']) * 100,
-            mode='lines+markers',
-            name='Player B Win Probability',
-            line=dict(color='#EC4899', width=2)
-        ))
-        fig_prob.update_layout(
-            title="Win Probability Evolution (Based on ELO)",
-            xaxis_title="Round",
-            yaxis_title="Win Probability (%)",
-            height=400
-        )
-        st.plotly_chart(fig_prob, use_container_width=True)
+        for chart in build_elo_figures(elo_points, elo_history_a, elo_history_b, df):
+            st.plotly_chart(chart, use_container_width=True)
     
     with tab2:
-        # Payoff evolution chart
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df['round'], y=df['payoff_a'], mode='lines+markers', name='Player A', line=dict(color='#3B82F6', width=3)))
-        fig.add_trace(go.Scatter(x=df['round'], y=df['payoff_b'], mode='lines+markers', name='Player B', line=dict(color='#EC4899', width=3)))
-        fig.update_layout(title="Payoff Evolution Over Rounds", xaxis_title="Round", yaxis_title="Payoff", height=400)
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # F-score evolution
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(x=df['round'], y=df['f_score'], mode='lines+markers', fill='tozeroy', line=dict(color='#8B5CF6', width=3)))
-        fig2.add_hline(y=0.8, line_dash="dash", line_color="green", annotation_text="Matched Threshold")
-        fig2.add_hline(y=0.6, line_dash="dash", line_color="blue", annotation_text="Engaged Threshold")
-        fig2.add_hline(y=0.4, line_dash="dash", line_color="orange", annotation_text="Complicated Threshold")
-        fig2.add_hline(y=0.2, line_dash="dash", line_color="red", annotation_text="Confused Threshold")
-        fig2.update_layout(title="Outcome Score (f) Evolution", xaxis_title="Round", yaxis_title="f Score", height=400)
-        st.plotly_chart(fig2, use_container_width=True)
+        for chart in build_payoff_figures(df):
+            st.plotly_chart(chart, use_container_width=True)
     
     with tab3:
-        # Strategy distribution
-        strategy_counts = df.groupby(['strategy_a', 'strategy_b']).size().reset_index(name='count')
-        
-        fig3 = go.Figure(data=[go.Bar(
-            x=strategy_counts.apply(lambda x: f"A:{x['strategy_a']}<br>B:{x['strategy_b']}", axis=1),
-            y=strategy_counts['count'],
-            marker_color=['#10B981' if 'Cooperate' in str(x) and 'Cooperate' in str(y) else '#EF4444' 
-                         for x, y in zip(strategy_counts['strategy_a'], strategy_counts['strategy_b'])]
-        )])
-        fig3.update_layout(title="Strategy Combination Frequency", xaxis_title="Strategy Pair", yaxis_title="Frequency", height=400)
-        st.plotly_chart(fig3, use_container_width=True)
-        
-        # Outcome distribution
-        outcome_counts = df['outcome'].value_counts()
-        fig4 = go.Figure(data=[go.Pie(labels=outcome_counts.index, values=outcome_counts.values, hole=0.4)])
-        fig4.update_layout(title="Outcome Distribution", height=400)
-        st.plotly_chart(fig4, use_container_width=True)
+        for chart in build_strategy_figures(history['strategy_a'][:n_rounds], history['strategy_b'][:n_rounds], df):
+            st.plotly_chart(chart, use_container_width=True)
     
     with tab4:
-        # Game type evolution
-        fig5 = go.Figure()
-        game_types = df['game_type'].unique()
-        for gt in game_types:
-            mask = df['game_type'] == gt
-            fig5.add_trace(go.Scatter(x=df[mask]['round'], y=[gt]*sum(mask), mode='markers', name=gt, marker=dict(size=12)))
-        fig5.update_layout(title="Game Type Evolution", xaxis_title="Round", yaxis_title="Game Type", height=400)
-        st.plotly_chart(fig5, use_container_width=True)
-        
-        # Utility comparison
-        fig6 = make_subplots(rows=1, cols=2, subplot_titles=("Player A Utility", "Player B Utility"))
-        fig6.add_trace(go.Scatter(x=df['round'], y=df['utility_a'], mode='lines+markers', name='Utility A', line=dict(color='#3B82F6')), row=1, col=1)
-        fig6.add_trace(go.Scatter(x=df['round'], y=df['utility_b'], mode='lines+markers', name='Utility B', line=dict(color='#EC4899')), row=1, col=2)
-        fig6.update_xaxes(title_text="Round", row=1, col=1)
-        fig6.update_xaxes(title_text="Round", row=1, col=2)
-        fig6.update_yaxes(title_text="Utility", row=1, col=1)
-        fig6.update_yaxes(title_text="Utility", row=1, col=2)
-        fig6.update_layout(height=400, showlegend=False)
-        st.plotly_chart(fig6, use_container_width=True)
+        for chart in build_game_type_figures(df):
+            st.plotly_chart(chart, use_container_width=True)
     
     with tab5:
-        # Detailed history table
-        display_df = df[['round', 'strategy_a', 'strategy_b', 'payoff_a', 'payoff_b', 
-                         'outcome', 'game_type', 'f_score', 'elo_a', 'elo_b', 
-                         'elo_change_a', 'elo_change_b']].copy()
-        
-        # Round values for display
-        display_df['elo_a'] = display_df['elo_a'].round(0).astype(int)
-        display_df['elo_b'] = display_df['elo_b'].round(0).astype(int)
-        display_df['elo_change_a'] = display_df['elo_change_a'].round(1)
-        display_df['elo_change_b'] = display_df['elo_change_b'].round(1)
-        display_df['f_score'] = display_df['f_score'].round(3)
-        
-        st.dataframe(
-            display_df,
-            use_container_width=True,
-            hide_index=True,
-            column_config={
-                'round': 'Round',
-                'strategy_a': 'Strategy A',
-                'strategy_b': 'Strategy B',
-                'payoff_a': 'Payoff A',
-                'payoff_b': 'Payoff B',
-                'outcome': 'Outcome',
-                'game_type': 'Game Type',
-                'f_score': 'f Score',
-                'elo_a': 'ELO A',
-                'elo_b': 'ELO B',
-                'elo_change_a': 'Δ ELO A',
-                'elo_change_b': 'Δ ELO B'
-            }
-        )
-        
-        # Download button
-        csv = df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Game History CSV",
-            data=csv,
-            file_name=f"relationship_game_theory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+        render_history_table(df)
 
 # ELO Statistics
-if st.session_state.game_history:
+if n_rounds:
     st.markdown("---")
     st.markdown("## 🏆 ELO Statistics & Performance")
     
-    col1, col2, col3, col4 = st.columns(4)
+    stats = st.session_state.round_stats
+    max_elo_a, max_elo_b = stats['peak_elo_a'], stats['peak_elo_b']
+    total_change_a = st.session_state.elo_a - 1500
+    total_change_b = st.session_state.elo_b - 1500
+    wins_a, wins_b, draws = stats['wins_a'], stats['wins_b'], stats['draws']
+    upsets_a, upsets_b = stats['upsets_a'], stats['upsets_b']
+    inv_n = 1.0 / n_rounds  # n_rounds > 0 in this block
     
-    with col1:
-        max_elo_a = max(st.session_state.elo_history_a)
-        st.metric("Player A Peak ELO", int(max_elo_a), 
-                  delta=f"+{int(max_elo_a - 1500)} from start")
-    
-    with col2:
-        max_elo_b = max(st.session_state.elo_history_b)
-        st.metric("Player B Peak ELO", int(max_elo_b),
-                  delta=f"+{int(max_elo_b - 1500)} from start")
-    
-    with col3:
-        total_change_a = st.session_state.elo_a - 1500
-        st.metric("Player A Total Change", f"{total_change_a:+.0f}",
-                  delta="Improved" if total_change_a > 0 else "Declined")
-    
-    with col4:
-        total_change_b = st.session_state.elo_b - 1500
-        st.metric("Player B Total Change", f"{total_change_b:+.0f}",
-                  delta="Improved" if total_change_b > 0 else "Declined")
+    # Per-player figures as one table rather than a metric element per value
+    st.dataframe(
+        pd.DataFrame({
+            'Peak ELO': [int(max_elo_a), int(max_elo_b)],
+            'Peak Gain': [f"+{int(max_elo_a - 1500)}", f"+{int(max_elo_b - 1500)}"],
+            'Total Change': [f"{total_change_a:+.0f}", f"{total_change_b:+.0f}"],
+            'Trend': ["Improved" if total_change_a > 0 else "Declined",
+                      "Improved" if total_change_b > 0 else "Declined"],
+            'Wins': [wins_a, wins_b],
+            'Win Rate': [f"{wins_a * inv_n * 100:.1f}%", f"{wins_b * inv_n * 100:.1f}%"],
+            'Upsets': [upsets_a, upsets_b],
+        }, index=['Player A', 'Player B']),
+        use_container_width=True
+    )
     
     # Performance metrics
     st.markdown("### 📊 Performance Breakdown")
     
-    wins_a = sum(1 for h in st.session_state.game_history if h['actual_a'] == 1.0)
-    wins_b = sum(1 for h in st.session_state.game_history if h['actual_a'] == 0.0)
-    draws = sum(1 for h in st.session_state.game_history if h['actual_a'] == 0.5)
-    
-    perf_col1, perf_col2, perf_col3, perf_col4 = st.columns(4)
+    perf_col1, perf_col2 = st.columns(2)
     
     with perf_col1:
-        st.metric("Player A Wins", wins_a, delta=f"{wins_a/len(st.session_state.game_history)*100:.1f}%")
+        st.metric("Draws", draws, delta=f"{draws * inv_n * 100:.1f}%")
     
     with perf_col2:
-        st.metric("Player B Wins", wins_b, delta=f"{wins_b/len(st.session_state.game_history)*100:.1f}%")
-    
-    with perf_col3:
-        st.metric("Draws", draws, delta=f"{draws/len(st.session_state.game_history)*100:.1f}%")
-    
-    with perf_col4:
-        avg_elo_change = df['elo_change_a'].abs().mean()
+        avg_elo_change = stats['sum_abs_elo_change'] * inv_n
         st.metric("Avg ELO Volatility", f"{avg_elo_change:.1f}")
-    
-    # Upset victories
-    upsets_a = sum(1 for h in st.session_state.game_history 
-                   if h['actual_a'] == 1.0 and h['expected_a'] < 0.5)
-    upsets_b = sum(1 for h in st.session_state.game_history 
-                   if h['actual_a'] == 0.0 and h['expected_a'] > 0.5)
-    
-    if upsets_a > 0 or upsets_b > 0:
-        st.markdown("### 🎉 Upset Victories")
-        upset_col1, upset_col2 = st.columns(2)
-        with upset_col1:
-            st.metric("Player A Upsets", upsets_a, 
-                     delta="Won as underdog" if upsets_a > 0 else None)
-        with upset_col2:
-            st.metric("Player B Upsets", upsets_b,
-                     delta="Won as underdog" if upsets_b > 0 else None)
 
 # Strategic Insights
 st.markdown("---")
 st.markdown("## 💡 Strategic Insights & Recommendations")
 
+# Read once; both columns compare the current ratings
+elo_a, elo_b = float(st.session_state.elo_a), float(st.session_state.elo_b)
+elo_diff = abs(elo_a - elo_b)
+
 col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("### 🎯 Current State Analysis")
     
     utility_diff = abs(utility_a - utility_b)
-    balance_status = "Balanced" if utility_diff < 2 else "Imbalanced"
-    
-    st.write(f"**Utility Difference:** {utility_diff:.2f} ({balance_status})")
-    st.write(f"**Nash Equilibrium Status:** {'✅ Achieved' if strategy_a == 'Cooperate' and strategy_b == 'Cooperate' else '❌ Not Achieved'}")
-    st.write(f"**Power Dynamic:** {'Equal' if utility_diff < 1.5 else 'Asymmetric'}")
-    st.write(f"**ELO Balance:** {'Competitive' if abs(st.session_state.elo_a - st.session_state.elo_b) < 100 else 'Unbalanced'}")
-    
-    if st.session_state.game_history:
-        recent_outcomes = [h['outcome'] for h in st.session_state.game_history[-5:]]
-        cooperation_rate = sum(1 for h in st.session_state.game_history[-5:] if h['strategy_a'] == 'Cooperate' and h['strategy_b'] == 'Cooperate') / min(5, len(st.session_state.game_history))
-        st.write(f"**Recent Cooperation Rate:** {cooperation_rate*100:.0f}%")
-        st.write(f"**Trend:** {'📈 Improving' if cooperation_rate > 0.6 else '📉 Declining' if cooperation_rate < 0.4 else '➡️ Stable'}")
+    # Status labels indexed by their condition (False -> 0, True -> 1)
+    balance_status = ("Balanced", "Imbalanced")[utility_diff >= 2]
+    nash_status = ("❌ Not Achieved", "✅ Achieved")[strategy_a == COOPERATE and strategy_b == COOPERATE]
+    power_dynamic = ("Equal", "Asymmetric")[utility_diff >= 1.5]
+    elo_balance = ("Competitive", "Unbalanced")[elo_diff >= 100]
+    
+    # Collected into one markdown element, one paragraph per line
+    lines = [
+        f"**Utility Difference:** {utility_diff:.2f} ({balance_status})",
+        f"**Nash Equilibrium Status:** {nash_status}",
+        f"**Power Dynamic:** {power_dynamic}",
+        f"**ELO Balance:** {elo_balance}",
+    ]
+    
+    if n_rounds:
+        recent_cooperation = st.session_state.recent_cooperation
+        cooperation_rate = sum(recent_cooperation) / len(recent_cooperation)
+        trend = ("📉 Declining", "➡️ Stable", "📈 Improving")[(cooperation_rate >= 0.4) + (cooperation_rate > 0.6)]
+        lines.append(f"**Recent Cooperation Rate:** {cooperation_rate*100:.0f}%")
+        lines.append(f"**Trend:** {trend}")
         
         # ELO momentum
-        if len(st.session_state.elo_history_a) >= 5:
-            elo_momentum_a = st.session_state.elo_history_a[-1] - st.session_state.elo_history_a[-5]
-            elo_momentum_b = st.session_state.elo_history_b[-1] - st.session_state.elo_history_b[-5]
-            st.write(f"**ELO Momentum A:** {elo_momentum_a:+.0f} (last 5 rounds)")
-            st.write(f"**ELO Momentum B:** {elo_momentum_b:+.0f} (last 5 rounds)")
+        recent_elo = st.session_state.recent_elo
+        if len(recent_elo) == RECENT_WINDOW:
+            (first_a, first_b), (last_a, last_b) = recent_elo[0], recent_elo[-1]
+            elo_momentum_a = last_a - first_a
+            elo_momentum_b = last_b - first_b
+            lines.append(f"**ELO Momentum A:** {elo_momentum_a:+.0f} (last 5 rounds)")
+            lines.append(f"**ELO Momentum B:** {elo_momentum_b:+.0f} (last 5 rounds)")
+    
+    st.markdown("\n\n".join(lines))
 
 with col2:
     st.markdown("### 📋 Recommendations")
     
-    if outcome == "MATCHED":
-        st.success("🎉 **Excellent!** You've reached Nash equilibrium. Maintain current cooperation level.")
-    elif outcome == "ENGAGED":
-        st.info("💍 **Good Progress!** Continue building trust and increasing mutual investment.")
-    elif outcome == "COMPLICATED":
-        st.warning("⚠️ **Power Games Detected.** Both players should increase authenticity and reduce defensive tactics.")
-    elif outcome == "CONFUSED":
-        st.warning("🤔 **Mixed Signals.** Improve communication clarity and consistency.")
-    else:
-        st.error("💔 **Misalignment.** Significant strategy change needed. Consider if goals are compatible.")
+    show_recommendation, recommendation = OUTCOME_RECOMMENDATIONS[outcome]
+    show_recommendation(recommendation)
     
     # ELO-based recommendations
-    elo_diff = abs(st.session_state.elo_a - st.session_state.elo_b)
     if elo_diff > 200:
-        if st.session_state.elo_a > st.session_state.elo_b:
+        if elo_a > elo_b:
             st.write("**ELO Gap:** Player A has significant skill advantage. Player B should learn from A's strategies.")
         else:
             st.write("**ELO Gap:** Player B has significant skill advantage. Player A should learn from B's strategies.")
     
-    if strategy_a == "Defect" or strategy_b == "Defect":
-        st.write("**Path Forward:**")
-        st.write("- Increase vulnerability and authenticity")
-        st.write("- Reduce manipulation tactics")
-        st.write("- Build trust through consistent actions")
-        st.write("- Move from defection to conditional cooperation")
-        st.write("- Focus on win-win outcomes to improve both ELO ratings")
+    if strategy_a == DEFECT or strategy_b == DEFECT:
+        st.markdown(PATH_FORWARD_MD)
     else:
-        st.write("**Maintain Success:**")
-        st.write("- Continue transparent communication")
-        st.write("- Keep investing mutually")
-        st.write("- Avoid complacency")
-        st.write("- Regular relationship check-ins")
-        st.write("- Sustain high ELO through consistent cooperation")
+        st.markdown(MAINTAIN_SUCCESS_MD)
 
 # Game Theory Conclusion
 st.markdown("---")
@@ -861,74 +1140,15 @@ st.markdown("## 🎓 Comprehensive Game Theory Conclusion")
 conclusion_col1, conclusion_col2 = st.columns([2, 1])
 
 with conclusion_col1:
-    st.markdown("""
-    ### This Relationship Game is:
-    
-    **1. Non-Cooperative Game (Transitioning to Cooperative)**
-    - Players independently maximize their utility initially
-    - Can evolve into cooperative game at Nash equilibrium
-    - Strategic interaction without binding agreements
-    
-    **2. Simultaneous Move Game**
-    - Both players adjust strategies without real-time opponent knowledge
-    - No sequential advantage
-    
-    **3. Imperfect & Incomplete Information Game**
-    - Imperfect: Cannot observe all actions (hidden intentions, pseudo-altruism)
-    - Incomplete: Don't know exact payoff functions of opponent
-    - Creates strategic uncertainty
-    
-    **4. Non-Zero-Sum Game**
-    - Both can win (8,8) or both can lose (4,4)
-    - Total welfare varies by outcome
-    - Cooperation increases total payoff
-    
-    **5. Asymmetric Game (Becoming Symmetric)**
-    - Different initial resources and strategies
-    - Becomes symmetric when equilibrium reached
-    - Role interchangeability at Nash equilibrium
-    
-    **6. Dynamic/Repeated Game**
-    - Multiple rounds with history
-    - Reputation effects matter
-    - Enables tit-for-tat and learning strategies
-    
-    **7. ELO Rating System Integration**
-    - Measures player skill in strategic relationship dynamics
-    - Adapts K-factor based on experience and rating
-    - Tracks performance evolution over time
-    - Identifies upsets and momentum shifts
-    
-    **8. Similar to Classic Games:**
-    - **Prisoner's Dilemma** (when trust is low)
-    - **Battle of Sexes** (coordination with preference differences)
-    - **Stag Hunt** (high cooperation payoff, requires trust)
-    - **Chicken Game** (brinkmanship, who yields first)
-    """)
+    st.markdown(CONCLUSION_MD)
 
 with conclusion_col2:
     st.markdown("### Key Properties")
     
-    properties = {
-        "Pareto Optimal": "(8,8) - Mutual Cooperation",
-        "Nash Equilibrium": "(8,8) when both cooperate",
-        "Dominant Strategy": "None (depends on opponent)",
-        "Best Response": "Tit-for-tat with forgiveness",
-        "Evolutionarily Stable": "Cooperation in repeated game",
-        "ELO Starting Rating": "1500",
-        "ELO Range": "0-3000"
-    }
-    
-    for prop, value in properties.items():
+    for prop, value in KEY_PROPERTIES:
         st.metric(prop, value)
 
 # Footer
 st.markdown("---")
-st.markdown("""
-<div style='text-align: center; color: #666;'>
-    <p>Built with Streamlit | Game Theory Analysis Framework with ELO Rating System</p>
-    <p>Based on Nash Equilibrium, Prisoner's Dilemma, Repeated Game Theory, and ELO Rating Algorithm</p>
-    <p>ELO system adapted from chess ratings - measures strategic relationship skill</p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
             